@@ -1,6 +1,39 @@
 """pkommand Small Subcommand Parser Extension."""
 
-from .command import Command
-from .exceptions import ParserException
-from .parser import Parser
-from .wrapper import Wrapper
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .command import Command
+    from .exceptions import ParserException
+    from .parser import Parser
+    from .wrapper import Wrapper
+
+__all__ = ["Command", "Parser", "ParserException", "Wrapper"]
+
+# submodules are imported on first attribute access, see PEP 562
+_LAZY = {
+    "Command": ("pkommand.command", "Command"),
+    "Parser": ("pkommand.parser", "Parser"),
+    "ParserException": ("pkommand.exceptions", "ParserException"),
+    "Wrapper": ("pkommand.wrapper", "Wrapper"),
+}
+_SUBMODULES = frozenset(["command", "container", "exceptions", "parser", "wrapper"])
+
+
+def __getattr__(name: str) -> Any:
+    """Import and return a public member or a submodule lazily."""
+    if name in _SUBMODULES:
+        value = import_module(f".{name}", __name__)
+    elif name in _LAZY:
+        module, attr = _LAZY[name]
+        value = getattr(import_module(module), attr)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """Return the public members."""
+    return list(__all__)
@@ -1,12 +1,27 @@
 """Subcommand templates."""
 
-from abc import ABC, abstractmethod
-from argparse import ArgumentParser, Namespace, _SubParsersAction
-from typing import cast, final
+from __future__ import annotations
 
+import sys
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, final
+from weakref import WeakSet
 
-class Command(ABC):
-    """A subcommand template."""
+if TYPE_CHECKING:
+    from argparse import ArgumentParser, Namespace, _SubParsersAction
+
+
+class Command:
+    """
+    A subcommand template.
+
+    Subclasses must implement `name`, `help`, `run` and `register`.
+    An instance is reused for every run, so `run` should not keep state on it.
+    Subclasses that need instance attributes declare their own `__slots__`.
+    """
+
+    __slots__ = ()
 
     @classmethod
     @final
@@ -15,47 +30,106 @@ class Command(ABC):
         return cls()
 
     @staticmethod
-    @abstractmethod
     def name() -> str:
         """Return command name."""
+        raise NotImplementedError
 
     @classmethod
-    @abstractmethod
     def help(cls) -> str:
         """Return command help."""
+        raise NotImplementedError
 
-    @abstractmethod
     def run(self, args: Namespace) -> None:
         """
         Execute the command.
 
         :param args: command arguments
         """
+        raise NotImplementedError
 
     @classmethod
-    @abstractmethod
     def register(cls, parser: ArgumentParser) -> None:
         """
         Register arguments to parser.
 
         :param parser: command parser for this command
         """
+        raise NotImplementedError
 
     @classmethod
     def register_parser(cls, subparsers: _SubParsersAction) -> ArgumentParser:
         """Register the command to subparser."""
-        p = subparsers.add_parser(cls.name(), help=cls.help())
+        p = subparsers.add_parser(command_name(cls), help=command_help(cls))
         cls.register(p)
         return p
 
 
+# :class: `Command` types already accepted by `CommandClassDict.set`
+_validated: WeakSet[type] = WeakSet()
+_ABSTRACT_METHODS = ("name", "help", "run", "register")
+
+
+def _unimplemented_methods(value: type) -> list[str]:
+    """Return the names of the :class: `Command` methods that `value` doesn't override."""
+
+    def implemented(attr: str) -> bool:
+        for klass in value.__mro__:
+            if klass is Command:
+                return False
+            if attr in vars(klass):
+                return True
+        return False
+
+    return [x for x in _ABSTRACT_METHODS if not implemented(x)]
+
+
+def _memoize(value: type, attr: str, f: Callable[[], str]) -> str:
+    """Return `f()` memoized on the class as `attr`."""
+    d = vars(value)
+    if attr in d:
+        return d[attr]
+    result = f()
+    setattr(value, attr, result)
+    return result
+
+
+def command_name(value: type) -> str:
+    """Return `Command.name` 's value memoized on the class."""
+    return _memoize(value, "__pkommand_name__", lambda: sys.intern(value.name()))  # type: ignore[attr-defined]
+
+
+def command_help(value: type) -> str:
+    """Return `Command.help` 's value memoized on the class."""
+    return _memoize(value, "__pkommand_help__", value.help)  # type: ignore[attr-defined]
+
+
+@dataclass
+class CommandRecord:
+    """A :class: `Command` type and its values looked up together on dispatch."""
+
+    command_class: type[Command]
+    help: str
+    instance: Command | None = None
+
+
 class CommandClassDict:
     """A dictionary contains :class: `Command` only."""
 
-    __class_dict: dict[str, type]
+    __records: dict[str, CommandRecord]
+    __keys_cache: tuple[str, ...] | None
 
     def __init__(self):  # noqa
-        self.__class_dict = {}
+        self.__records = {}
+        self.__keys_cache = None
+
+    def get_record(self, key: str) -> CommandRecord | None:
+        """
+        Return a `CommandRecord`.
+
+        Returns None if not found.
+        :param key: `Command.name` 's value you search
+        """
+        return self.__records.get(key)
 
     def get(self, key: str) -> type | None:
         """
@@ -64,31 +138,55 @@ class CommandClassDict:
         Returns None if not found.
         :param key: `Command.name` 's value you search
         """
-        return self.__class_dict.get(key)
+        r = self.__records.get(key)
+        if not r:
+            return None
+        return r.command_class
 
     def get_instance(self, key: str) -> Command | None:
         """
         Return a `Command`.
 
         Returns None if not found.
+        The instance is created on the first call and reused after that.
         :param key: `Command.name` 's value you search
         """
-        c = self.get(key)
-        if not c:
+        r = self.__records.get(key)
+        if not r:
             return None
-        return cast(Command, c.new())  # type: ignore
+        if r.instance is None:
+            r.instance = r.command_class.new()
+        return r.instance
 
     def set(self, value) -> None:
         """
         Store a :class: `Command` type.
 
-        :param value: type whose bases contain :class: `Command`
+        :param value: subclass of :class: `Command`
+        """
+        if value not in _validated:
+            if not isinstance(value, type) or not issubclass(value, Command):
+                raise TypeError("unsupported value type: {} is not a subclass of Command".format(value))
+            unimplemented = _unimplemented_methods(value)
+            if unimplemented:
+                raise TypeError("unsupported value type: {} doesn't implement {}".format(value, unimplemented))
+            _validated.add(value)
+        key = command_name(value)
+        self.__records[key] = CommandRecord(command_class=value, help=command_help(value))
+        self.__keys_cache = None
+
+    def set_record(self, key: str, record: CommandRecord) -> None:
+        """
+        Store a `CommandRecord` without validation.
+
+        :param key: `Command.name` 's value of the record
+        :param record: record of a validated :class: `Command` type
         """
-        if Command not in value.__bases__:
-            raise TypeError("unsupported value type: {}'s bases doesn't have Command".format(value))
-        key = value.name()
-        self.__class_dict[key] = value
+        self.__records[key] = record
+        self.__keys_cache = None
 
-    def keys(self) -> list[str]:
+    def keys(self) -> Sequence[str]:
         """Return all keys."""
-        return list(self.__class_dict.keys())
+        if self.__keys_cache is None:
+            self.__keys_cache = tuple(self.__records)
+        return self.__keys_cache
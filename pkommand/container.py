@@ -1,6 +1,7 @@
 """Simple functional containers."""
 
-from dataclasses import dataclass
+from __future__ import annotations
+
 from typing import Any, Callable, Generic, TypeVar
 
 from .exceptions import ContainerException
@@ -9,12 +10,16 @@ T = TypeVar("T")
 U = TypeVar("U")
 
 
-@dataclass
 class Opt(Generic[T]):
     """Optional."""
 
+    __slots__ = ("value",)
+
     value: T | None
 
+    def __init__(self, value: T | None):  # noqa
+        self.value = value
+
     @property
     def is_some(self) -> bool:
         """Return true if it's some."""
@@ -22,9 +27,21 @@ class Opt(Generic[T]):
 
     def and_then[U](self, f: Callable[[T], U | None]) -> "Opt[U]":  # type: ignore[valid-type]
         """Call `f` if it's some."""
-        if self.is_some:
-            return Opt(value=f(self.get()))
-        return self.none()
+        if self.value is not None:
+            return Opt.new(f(self.value))
+        return _NONE
+
+    def map_or[U](self, default: U, f: Callable[[T], U]) -> U:  # type: ignore[valid-type]
+        """Return `f(value)` if it's some else `default`."""
+        if self.value is not None:
+            return f(self.value)
+        return default
+
+    def or_else(self, f: Callable[[], "Opt[T]"]) -> "Opt[T]":
+        """Return this if it's some else `f()`."""
+        if self.value is not None:
+            return self
+        return f()
 
     def then(self, f: Callable[[T], None]) -> None:
         """Call `f` if it's some."""
@@ -53,13 +70,11 @@ class Opt(Generic[T]):
         """Return true if this == other."""
         if not isinstance(other, Opt):
             return False
-        match (self.is_some, other.is_some):
-            case (False, False):
-                return True
-            case (True, True):
-                return self.get() == other.get()
-            case _:
-                return False
+        a = self.value is not None
+        b = other.value is not None
+        if a != b:
+            return False
+        return not a or self.value == other.value
 
     def __bool__(self) -> bool:
         """Return true if it's some."""
@@ -71,22 +86,32 @@ class Opt(Generic[T]):
             return f"Opt({self.value})"
         return "none"
 
+    def __repr__(self) -> str:
+        """Return string representation."""
+        return f"Opt(value={self.value!r})"
+
     @staticmethod
     def some(value: T) -> "Opt[T]":
         """Return a new some value."""
-        return Opt(value=value)
+        return Opt.new(value)
 
     @staticmethod
     def none() -> "Opt":
-        """Return a new none value."""
-        return Opt(value=None)
+        """Return the none value."""
+        return _NONE
 
     @staticmethod
     def new(value: T | None) -> "Opt[T]":
-        """Return a new `Opt`."""
+        """Return a new `Opt`, the shared none value if `value` is None."""
+        if value is None:
+            return _NONE
         return Opt(value=value)
 
 
+_NONE: Opt = Opt(value=None)
+_MISSING = object()
+
+
 def get_attribute(obj: Any, name: str) -> Opt[Any]:
     """
     Wrap `getattr()`.
@@ -94,6 +119,7 @@ def get_attribute(obj: Any, name: str) -> Opt[Any]:
     if obj has name attr then some, else none.
     Note: obj has name attr and the value is None then none.
     """
-    if hasattr(obj, name):
-        return Opt.new(getattr(obj, name))
-    return Opt.none()
+    v = getattr(obj, name, _MISSING)
+    if v is _MISSING or v is None:
+        return _NONE
+    return Opt(v)
@@ -1,16 +1,19 @@
 """:class: `argparse.ArgumentParser` extensions for subcommand."""
 
 import sys
-from argparse import ArgumentParser, Namespace
+from argparse import ArgumentError, ArgumentParser, Namespace, _SubParsersAction
+from collections.abc import Sequence
 from typing import Callable, NoReturn, override
 
-from .command import Command, CommandClassDict
+from .command import Command, CommandClassDict, CommandRecord, command_help, command_name
 from .exceptions import NoDefaultRunException, NoSubcommandsException, ParserException
 
 
 class HelpCommand(Command):
     """Default help command."""
 
+    __slots__ = ()
+
     @override
     @staticmethod
     def name() -> str:  # noqa
@@ -31,6 +34,10 @@ class HelpCommand(Command):
         parser.add_argument("subcommand", nargs="?")
 
 
+_HELP_NAME = command_name(HelpCommand)
+_HELP_HELP = command_help(HelpCommand)
+
+
 def default_run_print_help(
     parser: ArgumentParser,
     args: list[str] | None = None,
@@ -44,7 +51,9 @@ class Parser(ArgumentParser):
     """An ArgumentParser using :class: `Command`."""
 
     __ccd: CommandClassDict
-    __subparsers: dict[str, ArgumentParser]
+    __subparsers_action: _SubParsersAction | None
+    __help_cache: tuple[tuple, str] | None
+    __registered: bool
     __default_run: Callable[[ArgumentParser, list[str] | None, Namespace | None], None] | None
 
     def __init__(
@@ -63,11 +72,13 @@ class Parser(ArgumentParser):
         :default_run: set default_run function. This has the same effect as overriding `default_run`.
         """
         kwargs["add_help"] = add_help
+        self.__help_cache = None
         super().__init__(*args, **kwargs)
         self.__default_run = default_run
         self.__ccd = CommandClassDict()
-        self.add_command_class(HelpCommand)
-        self.__subparsers = {}
+        self.__ccd.set_record(_HELP_NAME, CommandRecord(command_class=HelpCommand, help=_HELP_HELP))
+        self.__subparsers_action = None
+        self.__registered = False
 
     def error(self, message: str) -> NoReturn:  # noqa
         # avoid exiting directly on parse_args error
@@ -76,35 +87,97 @@ class Parser(ArgumentParser):
     def _get_command_instance(self, command_name: str) -> Command | None:
         return self.__ccd.get_instance(command_name)
 
-    def _get_command_names(self) -> list[str]:
+    def _get_command_names(self) -> Sequence[str]:
         return self.__ccd.keys()
 
     def add_command_class(self, command_class) -> None:
         """
         Append a subcommand.
 
-        :param command_class: type whose bases contain :class: `Command`
+        :param command_class: subclass of :class: `Command`
         """
         self.__ccd.set(command_class)
+        self.__help_cache = None
+        self.__registered = False
+
+    def _get_record(self, command_name: str) -> CommandRecord | None:
+        return self.__ccd.get_record(command_name)
 
     def _get_subparser(self, command_name: str) -> ArgumentParser | None:
-        return self.__subparsers.get(command_name)
+        if self.__subparsers_action is None:
+            return None
+        return self.__subparsers_action.choices.get(command_name)
 
-    def _add_subparser(self, command_name: str, p: ArgumentParser) -> None:
-        self.__subparsers[command_name] = p
+    def _sniff_subcommands(self, args: list[str]) -> Sequence[str]:
+        """
+        Return the names of the subcommands that `args` may invoke.
+
+        Returns all names when the help is requested or no known name is found,
+        because the help lists all subcommands.
+        """
+        tokens = set(args)
+        help_flags = {f"{c}h" for c in self.prefix_chars} | {f"{c}{c}help" for c in self.prefix_chars}
+        if _HELP_NAME in tokens or not tokens.isdisjoint(help_flags):
+            return self._get_command_names()
+        # look up the tokens rather than scanning all names
+        found = list(dict.fromkeys(x for x in args if self._get_record(x)))
+        return found or self._get_command_names()
 
-    def _register_commands(self) -> None:
-        if not self._get_command_names():
+    def _register_commands(self, args: list[str] | None = None, register_all: bool = False) -> None:
+        if self.__registered:
+            return
+        names = self._get_command_names()
+        if not names:
             raise NoSubcommandsException()
-        sp = self.add_subparsers(dest="command")
-        for command_name in self._get_command_names():
-            c = self._get_command_instance(command_name)
-            if not c:
-                raise NoSubcommandsException(command_name)
-            self._add_subparser(
-                command_name,
-                c.register_parser(sp),
-            )
+        if self.__subparsers_action is None:
+            self.__subparsers_action = self.add_subparsers(dest="command")
+        sp = self.__subparsers_action
+        targets = names if register_all else self._sniff_subcommands(sys.argv[1:] if args is None else args)
+        missing = [x for x in targets if x not in sp.choices]
+        if not missing:  # the invoked subcommands are registered already
+            return
+        for name in missing:
+            r = self._get_record(name)
+            if not r:
+                raise NoSubcommandsException(name)
+            r.command_class.register_parser(sp)
+        self.__help_cache = None
+        self._sort_subparsers(sp)
+        # choices also contain aliases, so check by name
+        self.__registered = all(x in sp.choices for x in names)
+
+    def _sort_subparsers(self, sp: _SubParsersAction) -> None:
+        """Keep the order of `add_command_class` in the usage even if the commands are registered lazily."""
+        order = {x: i for i, x in enumerate(self._get_command_names())}
+        parser_order = {id(p): order[x] for x, p in sp.choices.items() if x in order}
+        # aliases follow their command because the sort is stable
+        items = sorted(sp.choices.items(), key=lambda x: parser_order.get(id(x[1]), len(order)))
+        sp.choices.clear()
+        sp.choices.update(items)
+        sp._choices_actions.sort(key=lambda x: order.get(x.dest, len(order)))
+
+    def _is_help_only(self, args: list[str]) -> bool:
+        """Return true if `args` is `help [subcommand]` that needs no argument parsing."""
+        if args[:1] != [_HELP_NAME] or len(args) > 2:
+            return False
+        if len(args) == 2 and args[1][:1] in self.prefix_chars:
+            return False
+        # a positional argument of this parser may consume the first token
+        return all(x.option_strings for x in self._actions if x is not self.__subparsers_action)
+
+    def _handle_help(self, subcommand: str | None) -> None:
+        if not subcommand:
+            self.print_help()
+            return
+        r = self._get_record(subcommand)
+        subparser = self._get_subparser(subcommand)
+        if not (r and subparser):
+            print(f"unknown command: {subcommand}", file=sys.stderr)
+            self.print_help()
+            return
+        subparser.print_help()
+        print()
+        print(r.help)
 
     def run(self, args=None, namespace=None) -> None:
         """
@@ -113,25 +186,19 @@ class Parser(ArgumentParser):
         :param args: (optional) string list to be parsed
         :param namespace: (optional) object to be assigned attributes
         """
-        args = self.parse_args(args=args, namespace=namespace)
+        argv = list(sys.argv[1:] if args is None else args)  # args may be an iterator
+        self._register_commands(argv)
+        if self._is_help_only(argv):
+            self._handle_help(argv[1] if len(argv) == 2 else None)
+            return
+        args = self._parse_args(argv, namespace)
         if not args:
             return
         if not args.command:
             self.default_run(args=args, namespace=namespace)
             return
-        if args.command == "help":
-            if not args.subcommand:
-                self.print_help()
-                return
-            subparser = self._get_subparser(args.subcommand)
-            instance = self._get_command_instance(args.subcommand)
-            if not (subparser and instance):
-                print(f"unknown command: {args.subcommand}", file=sys.stderr)
-                self.print_help()
-                return
-            subparser.print_help()
-            print()
-            print(instance.help())
+        if args.command is _HELP_NAME or args.command == _HELP_NAME:
+            self._handle_help(args.subcommand)
             return
         c = self._get_command_instance(args.command)
         if not c:
@@ -152,13 +219,44 @@ class Parser(ArgumentParser):
             return
         raise NoDefaultRunException()
 
+    def format_help(self) -> str:  # noqa
+        # reuse the help while the arguments, the subcommands, the defaults and the texts are unchanged
+        key = (len(self._actions), self.prog, self.usage, self.description, self.epilog, self.formatter_class)
+        if self.__help_cache is None or self.__help_cache[0] != key:
+            self.__help_cache = (key, super().format_help())
+        return self.__help_cache[1]
+
+    def set_defaults(self, **kwargs) -> None:  # noqa
+        super().set_defaults(**kwargs)
+        self.__help_cache = None
+
     def parse_args(self, args=None, namespace=None):  # noqa
-        self._register_commands()
+        args = list(sys.argv[1:] if args is None else args)  # args may be an iterator
+        self._register_commands(args)
+        return self._parse_args(args, namespace)
+
+    def _parse_args(self, args, namespace):
+        """Parse `args` with the subcommands registered by `_register_commands`."""
+        if not args and not self._defaults and all(x is self.__subparsers_action for x in self._actions):
+            # nothing to parse, no subcommand is specified
+            if namespace is None:
+                namespace = Namespace()
+            if not hasattr(namespace, "command"):
+                namespace.command = None
+            return namespace
         try:
             return super().parse_args(args=args, namespace=namespace)
-        except Exception as e:  # pylint: disable=broad-except
-            self.on_parse_exception(exc=e, file=sys.stderr)
-            return None
+        except (ArgumentError, ParserException) as e:
+            exc: Exception = e
+        if not self.__registered:
+            # parse again with all subcommands so that the error and the help list them
+            self._register_commands(register_all=True)
+            try:
+                return super().parse_args(args=args, namespace=namespace)
+            except (ArgumentError, ParserException) as e:
+                exc = e
+        self.on_parse_exception(exc=exc, file=sys.stderr)
+        return None
 
     def on_parse_exception(self, exc: Exception, file=None) -> NoReturn:
         """
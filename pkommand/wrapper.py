@@ -1,24 +1,54 @@
 """Function-based CLI."""
 
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
-from argparse import Action, ArgumentParser, Namespace
+from argparse import ArgumentParser, Namespace
+from collections.abc import Hashable
 from dataclasses import dataclass
-from functools import cached_property
+from functools import lru_cache
 from inspect import Parameter, Signature, isfunction, signature
 from textwrap import dedent
-from typing import Any, Callable, Protocol, cast, override
+from typing import TYPE_CHECKING, Any, Callable, Protocol, cast, get_args, get_origin, override
+from weakref import WeakKeyDictionary, WeakValueDictionary
 
 from .command import Command
-from .container import Opt, get_attribute
+from .container import Opt
 from .exceptions import WrapperException
 from .parser import Parser
 
+if TYPE_CHECKING:
+    from argparse import Action
+
 
 class BadTargetException(WrapperException):
     """An exception when wrapper received a bad object."""
 
 
-@dataclass
+class _cached_property[T]:
+    """
+    Lightweight `functools.cached_property`.
+
+    Stores the computed value into the instance `__dict__`,
+    which shadows this non-data descriptor on later accesses.
+    """
+
+    def __init__(self, func: Callable[[Any], T]):  # noqa
+        self.func = func
+        self.name = func.__name__
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, obj: Any, objtype: type | None = None) -> T:
+        if obj is None:
+            return self  # type: ignore[return-value]
+        v = self.func(obj)
+        obj.__dict__[self.name] = v
+        return v
+
+
+@dataclass(slots=True)
 class Default:
     """Default value of the function parameter."""
 
@@ -32,7 +62,7 @@ class Default:
         return Opt.some(Default(val=p.default))
 
 
-@dataclass
+@dataclass(slots=True)
 class Annotation:
     """Annotation of the function parameter."""
 
@@ -52,7 +82,7 @@ class Annotation:
 
         e.g. List of List[T], Optional of Optional[T]
         """
-        return get_attribute(self.typ, "_name").get_or(self.typ.__name__)
+        return getattr(self.typ, "_name", None) or self.typ.__name__
 
     @property
     def type(self) -> Any:
@@ -61,12 +91,12 @@ class Annotation:
 
         e.g. bool of bool, T of List[T], Optional[T]
         """
-        return get_attribute(self.typ, "__args__").and_then(lambda x: x[0]).get_or(self.typ)
+        return (get_args(self.typ) or (self.typ,))[0]
 
     @property
     def wrapped(self) -> bool:
-        """Annotation type is generic or not."""
-        return hasattr(self.typ, "__args__")
+        """Annotation type is a parameterized generic or not."""
+        return bool(get_args(self.typ))
 
 
 @dataclass
@@ -96,7 +126,7 @@ class Param:
         """Return default value of the parameter."""
         return Default.new(self.p)
 
-    @property
+    @_cached_property
     def flag_names(self) -> list[str]:
         """Names of the parameter as a CLI flag."""
         name = self.p.name
@@ -113,12 +143,49 @@ class Param:
         return str(self.p)
 
 
-@dataclass
+@dataclass(slots=True)
+class ResolvedParam:
+    """`Param` with its flag names, annotation and default computed once."""
+
+    param: Param
+    flag_names: list[str]
+    type: Any
+    type_name: str
+    wrapped: bool
+    default: Opt[Default]
+
+    @staticmethod
+    def new(p: Param) -> Opt[ResolvedParam]:
+        """Return a new `ResolvedParam`, none if the parameter is not annotated."""
+        annotation = p.annotation
+        if not annotation.is_some:
+            return Opt.none()
+        a = annotation.get()
+        return Opt.some(
+            ResolvedParam(
+                param=p,
+                flag_names=p.flag_names,
+                type=a.type,
+                type_name=a.name,
+                wrapped=a.wrapped,
+                default=p.default,
+            )
+        )
+
+    def __str__(self) -> str:
+        """Return a string expression."""
+        return str(self.param)
+
+
+@dataclass(slots=True)
 class RegArg:
     """Arguments for `argparse.Parser.add_argument`."""
 
     args: list[Any]
     kwargs: dict[str, Any]
+    # builds the value passed to the function when argparse gives None,
+    # for the mutable defaults that must not be shared between the calls
+    default_factory: Callable[[], Any] | None = None
 
     def apply(self, p: ArgumentParser) -> None:
         """Call `add_argument`."""
@@ -130,34 +197,48 @@ class RegArgList(list[RegArg]):
 
     def apply(self, p: ArgumentParser) -> None:
         """Call `add_argument`."""
-        for a in self:
-            a.apply(p)
+        if not self:
+            return
+        # add_argument creates a formatter to validate each argument, share one among them
+        formatter = p._get_formatter()
+        p._get_formatter = lambda: formatter  # type: ignore[method-assign]
+        try:
+            for a in self:
+                a.apply(p)
+        finally:
+            del p._get_formatter
+
+
+# shared by the functions without parameters, must not be modified
+_EMPTY_REGARGS = RegArgList()
 
 
 class ParamToArg(ABC):
     """Function parameter to `RegArg` converter."""
 
     @abstractmethod
-    def parse(self, p: Param) -> Opt[RegArg]:
+    def parse(self, p: ResolvedParam) -> Opt[RegArg]:
         """Parse function parameter to `RegArg`."""
         return Opt.none()
 
     def __call__(self, p: Param) -> Opt[RegArg]:
         """Convert a function parameter into `RegArg`."""
-        return p.annotation.and_then(lambda _: self.parse(p)).flatten()
+        rp = ResolvedParam.new(p)
+        if not rp.is_some:
+            return Opt.none()
+        return self.parse(rp.get())
 
 
 class BoolParamToArg(ParamToArg):
     """Bool parameter to `RegArg` converter."""
 
     @override
-    def parse(self, p: Param) -> Opt[RegArg]:
+    def parse(self, p: ResolvedParam) -> Opt[RegArg]:
         """Parse a function parameter into `RegArg`."""
-        a = p.annotation.get()
-        if a.type is not bool or a.wrapped:
+        if p.type is not bool or p.wrapped:
             return Opt.none()
 
-        action = p.default.and_then(lambda x: "store_false" if x.val else "store_true").get_or("store_true")
+        action = "store_false" if p.default.is_some and p.default.get().val else "store_true"
         return Opt.some(
             RegArg(
                 args=p.flag_names,
@@ -172,13 +253,12 @@ class DefaultParamToArg(ParamToArg):
     """Default parameter to `RegArg` converter."""
 
     @override
-    def parse(self, p: Param) -> Opt[RegArg]:
+    def parse(self, p: ResolvedParam) -> Opt[RegArg]:
         """Parse a function parameter into `RegArg`."""
-        a = p.annotation.get()
-        if a.wrapped:
+        if p.wrapped or get_origin(p.type) is not None:  # reject bare generics like `List`
             return Opt.none()
         kwargs = {
-            "type": a.type,
+            "type": p.type,
         }
         if p.default.is_some:
             kwargs["default"] = p.default.get().val
@@ -191,34 +271,47 @@ class OptionalParamToArg(ParamToArg):
     """Optional parameter to `RegArg` converter."""
 
     @override
-    def parse(self, p: Param) -> Opt[RegArg]:
+    def parse(self, p: ResolvedParam) -> Opt[RegArg]:
         """Parse a function parameter into `RegArg`."""
-        a = p.annotation.get()
-        if not (a.wrapped and a.name == "Optional"):
+        if not (p.wrapped and p.type_name == "Optional"):
             return Opt.none()
         kwargs = {
-            "type": a.type,
+            "type": p.type,
             "default": p.default.get().val if p.default.is_some else None,
         }
         return Opt.some(RegArg(args=p.flag_names, kwargs=kwargs))
 
 
+_LIST_NAMES = frozenset(["list", "List"])
+
+
 class ListParamToArg(ParamToArg):
     """List parameter to `RegArg` converter."""
 
     @override
-    def parse(self, p: Param) -> Opt[RegArg]:
+    def parse(self, p: ResolvedParam) -> Opt[RegArg]:
         """Parse a function parameter into `RegArg`."""
-        a = p.annotation.get()
-        if not (a.wrapped and a.name in ["list", "List"]):
+        if not (p.wrapped and p.type_name in _LIST_NAMES):
             return Opt.none()
         kwargs = {
-            "type": a.type,
+            "type": p.type,
             "action": "store",
             "nargs": "*",
-            "default": p.default.get().val if p.default.is_some else [],
+            "default": p.default.get().val if p.default.is_some else None,
         }
-        return Opt.some(RegArg(args=p.flag_names, kwargs=kwargs))
+        return Opt.some(RegArg(args=p.flag_names, kwargs=kwargs, default_factory=None if p.default.is_some else list))
+
+
+@lru_cache(maxsize=512)
+def _lru_signature(func: Callable) -> Signature:
+    return signature(func)
+
+
+def _cached_signature(func: Callable) -> Signature:
+    """Return the signature of `func`, memoized if `func` is hashable."""
+    if isinstance(func, Hashable):
+        return _lru_signature(func)
+    return signature(func)
 
 
 @dataclass
@@ -239,10 +332,10 @@ class Function:
             return self.func.__doc__
         return ""
 
-    @cached_property
+    @_cached_property
     def signature(self) -> Signature:
         """Signature of function."""
-        return signature(self.func)
+        return _cached_signature(self.func)
 
     @staticmethod
     def new(func: Callable) -> "Function":
@@ -258,61 +351,92 @@ class CustomActionProto(Protocol):
         """Convert value into the value of the implementing type."""
 
 
+_custom_action_types: WeakKeyDictionary[Any, bool] = WeakKeyDictionary()
+
+
+def _is_custom_action(typ: Any) -> bool:
+    """Return true if `typ` implements `CustomActionProto`."""
+    try:
+        return _custom_action_types[typ]
+    except (KeyError, TypeError):  # not cached yet or not weakly referenceable
+        pass
+    result = _check_custom_action(typ)
+    try:
+        _custom_action_types[typ] = result
+    except TypeError:
+        pass
+    return result
+
+
+def _check_custom_action(typ: Any) -> bool:
+    if CustomActionProto in getattr(typ, "__bases__", ()):  # extend proto explicitly
+        return True
+    parse = getattr(typ, "parse_flag", None)  # has parse_flag() ?
+    if not isfunction(parse):
+        return False
+    parsef = Function.new(cast(Callable, parse))
+    return len(parsef.signature.parameters) == 1
+
+
+@lru_cache(maxsize=512)  # bounded: the generated class refers to target_type strongly
+def _make_custom_action(target_type: Any) -> type[Action]:
+    """Return an `Action` that converts the value by `parse_flag` of `target_type`."""
+    from argparse import Action, ArgumentError, ArgumentTypeError
+
+    class A(Action):
+        _parse_flag = staticmethod(target_type.parse_flag)
+
+        def __init__(
+            self,
+            option_strings,
+            dest,
+            default=None,
+            type=None,
+            choices=None,
+            required=False,
+            help=None,
+            metavar=None,
+        ):
+            super().__init__(
+                option_strings=option_strings,
+                dest=dest,
+                default=default,
+                type=type,
+                choices=choices,
+                required=required,
+                help=help,
+                metavar=metavar,
+            )
+
+        def __call__(self, parser, namespace, values, option_string=None):
+            try:
+                v = self._parse_flag(values)
+            except ArgumentTypeError as e:
+                raise ArgumentError(self, str(e)) from e
+            except Exception as e:  # parse_flag is user code, report anything it raises as a parse error
+                raise ArgumentError(self, f"invalid {target_type.__name__} value: {values!r}: {e}") from e
+            setattr(namespace, self.dest, v)
+
+    return A
+
+
 class CustomParamToArg(ParamToArg):
     """Custom argument type to `RegArg` converter."""
 
-    def validate(self, p: Param) -> bool:
+    def validate(self, p: ResolvedParam) -> bool:
         """Parameter type is proper to custom argument type or not."""
-        a = p.annotation.get()
-        if a.wrapped:  # avoid generic
-            return False
-        if CustomActionProto in a.type.__bases__:  # extend proto explicitly
-            return True
-        parse = get_attribute(a.type, "parse_flag")  # has parse_flag() ?
-        if not parse.is_some:
-            return False
-        parse = parse.get()
-        if not isfunction(parse):
+        if p.wrapped:  # avoid generic
             return False
-        parsef = Function.new(cast(Callable, parse))
-        return len(parsef.signature.parameters) == 1
+        return _is_custom_action(p.type)
 
     @override
-    def parse(self, p: Param) -> Opt[RegArg]:
+    def parse(self, p: ResolvedParam) -> Opt[RegArg]:
         """Parse a function parameter into `RegArg`."""
-        a = p.annotation.get()
-
         if not self.validate(p):
             return Opt.none()
 
-        class A(Action):
-            def __init__(
-                self,
-                option_strings,
-                dest,
-                default=None,
-                type=None,
-                choices=None,
-                required=False,
-                help=None,
-                metavar=None,
-            ):
-                super().__init__(
-                    option_strings=option_strings,
-                    dest=dest,
-                    default=default,
-                    type=type,
-                    choices=choices,
-                    required=required,
-                    help=help,
-                    metavar=metavar,
-                )
-
-            def __call__(self, parser, namespace, values, option_string=None):
-                setattr(namespace, self.dest, a.type.parse_flag(values))
-
         kwargs: dict[str, Any] = {
-            "action": A,
+            "action": _make_custom_action(p.type),
         }
         if p.default.is_some:
             kwargs["default"] = p.default.get().val
@@ -321,33 +445,63 @@ class CustomParamToArg(ParamToArg):
         return Opt.some(RegArg(args=p.flag_names, kwargs=kwargs))
 
 
+# converters selected by (wrapped, type_name) of `ResolvedParam`
+_DISPATCH: dict[tuple[bool, str], ParamToArg] = {
+    (False, "bool"): BoolParamToArg(),
+    (True, "Optional"): OptionalParamToArg(),
+    (True, "list"): ListParamToArg(),
+    (True, "List"): ListParamToArg(),
+}
+# converters tried in order when `_DISPATCH` has no match
+_PARAM_PARSERS: tuple[ParamToArg, ...] = (
+    CustomParamToArg(),
+    DefaultParamToArg(),
+)
+
+
 class RegArgGenerator:
     """Function to command arguments converter."""
 
     @classmethod
     def generate(cls, f: Function, abbr: bool = False) -> RegArgList:
         """Generate command arguments."""
-        return RegArgList([cls.parse(x, abbr) for x in f.signature.parameters.values()])
+        parameters = f.signature.parameters
+        if not parameters:
+            return _EMPTY_REGARGS
+        result = RegArgList()
+        abbrs: set[str] = set()  # abbreviations already taken by the preceding parameters
+        for x in parameters.values():
+            a = x.name[0]
+            result.append(cls.parse(x, abbr and a not in abbrs))
+            if abbr:
+                abbrs.add(a)
+        return result
 
     @staticmethod
     def parse(parameter: Parameter, abbr: bool = False) -> RegArg:
         """Parse a function parameter as a command argument."""
         param = Param.new(parameter, abbr)
-        parsers: list[ParamToArg] = [
-            CustomParamToArg(),
-            BoolParamToArg(),
-            OptionalParamToArg(),
-            ListParamToArg(),
-            DefaultParamToArg(),
-        ]
-        for parser in parsers:
-            v = parser.parse(param)
-            if v.is_some:
-                return v.get()
+        resolved = ResolvedParam.new(param)
+        if not resolved.is_some:
+            raise BadTargetException(f"{param} is not annotated")
+        rp = resolved.get()
+        converter = _DISPATCH.get((rp.wrapped, rp.type_name))
+        if converter:
+            v = converter.parse(rp).value
+            if v is not None:
+                return v
+        for parser in _PARAM_PARSERS:
+            v = parser.parse(rp).value
+            if v is not None:
+                return v
         raise BadTargetException(param)
 
 
-@dataclass
+# generated `Command` classes by (function, abbr)
+_generated_classes: WeakValueDictionary[tuple[Callable, bool], type] = WeakValueDictionary()
+
+
+@dataclass(slots=True)
 class CommandGenerator:
     """Function to `Command` converter."""
 
@@ -371,28 +525,73 @@ class CommandGenerator:
         return f"pk_generated_{self.func.name}"
 
     def generate(self, abbr: bool = False) -> type:
-        """Generate `Command` class definition."""
+        """
+        Generate `Command` class definition.
+
+        Returns the class generated before if the same function and `abbr` were given.
+        """
+        key = (self.func.func, abbr)
+        klass = _generated_classes.get(key)
+        if klass is None:
+            klass = self._generate(abbr)
+            _generated_classes[key] = klass
+        return klass
+
+    def _generate_run(
+        self,
+        positional: tuple[str, ...],
+        keyword: tuple[str, ...],
+        factories: dict[str, Callable[[], Any]],
+    ) -> Callable[[Command, Namespace], None]:
+        """
+        Generate `Command.run` that calls the function with the parsed arguments.
+
+        e.g. `def run(self, args): _f(args.a, b=args.b)` for `def f(a, *, b)`.
+        The names are safe to embed because `inspect.Parameter` accepts only identifiers.
+        The arguments in `factories` get a new value when argparse gives None.
+        """
+        g: dict[str, Any] = {"_f": self.func.func}
+
+        def value(x: str) -> str:
+            if x not in factories:
+                return f"args.{x}"
+            g[f"_d_{x}"] = factories[x]
+            return f"(_d_{x}() if args.{x} is None else args.{x})"
+
+        call_args = [value(x) for x in positional] + [f"{x}={value(x)}" for x in keyword]
+        src = f"def run(self, args):\n    _f({', '.join(call_args)})\n"
+        ns: dict[str, Any] = {}
+        exec(src, g, ns)
+        return ns["run"]
+
+    def _generate(self, abbr: bool) -> type:
         regargs = self.regargs(abbr)
         this = self
+        parameters = self.func.signature.parameters.values()
+        positional = tuple(x.name for x in parameters if x.kind != Parameter.KEYWORD_ONLY)
+        keyword = tuple(x.name for x in parameters if x.kind == Parameter.KEYWORD_ONLY)
+        # regargs are in the order of the parameters
+        factories = {x.name: r.default_factory for x, r in zip(parameters, regargs) if r.default_factory}
 
         def name() -> str:
             return this.func.name
 
+        help_text = dedent(this.func.doc).strip()
+
         def _help(cls) -> str:
-            return dedent(this.func.doc).strip()
+            return help_text
 
         def register(cls, parser: ArgumentParser):
-            regargs.apply(parser)
+            cls._regargs.apply(parser)
 
-        def run(self, args: Namespace):
-            vs = vars(args)
-            del vs["command"]  # delete unexpected argument
-            this.func.func(**vs)
+        run = self._generate_run(positional, keyword, factories)
 
         return type(
             this.class_name(),
             (Command,),
             {
+                "__slots__": (),
+                "_regargs": regargs,
                 "name": staticmethod(name),
                 "help": classmethod(_help),
                 "run": run,
@@ -476,7 +675,8 @@ class Wrapper:
     def f(name: str, next: int):
         ...
     ```
-    causes conflict, abbreviations of `name` and `next` are the same `-n`.
+    abbreviations of `name` and `next` are the same `-n`,
+    so only the first parameter `name` gets `-n` and `next` can be only specified by `--next`.
 
     Prevent abbreviations by:
     ```
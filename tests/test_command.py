@@ -26,11 +26,25 @@ class TestCommandClassDict(unittest.TestCase):
         ccd = command.CommandClassDict()
         self.assertIsNone(ccd.get(pcname))
         self.assertIsNone(ccd.get_instance(pcname))
-        self.assertEqual(ccd.keys(), [])
+        self.assertEqual(ccd.keys(), ())
         ccd.set(PseudoCommand)
         self.assertTrue(ccd.get(pcname) is PseudoCommand)
         self.assertTrue(isinstance(ccd.get_instance(pcname), PseudoCommand))
-        self.assertEqual(ccd.keys(), [pcname])
+        self.assertTrue(ccd.get_instance(pcname) is ccd.get_instance(pcname))
+        self.assertEqual(ccd.keys(), (pcname,))
+
+    def test_set_indirect_subclass(self):
+        class C(PseudoCommand):
+            @staticmethod
+            def name():
+                return "indirect"
+
+        ccd = command.CommandClassDict()
+        ccd.set(PseudoCommand)
+        ccd.set(C)
+        self.assertTrue(ccd.get("indirect") is C)
+        self.assertTrue(ccd.get(PseudoCommand.name()) is PseudoCommand)
+        self.assertEqual(ccd.keys(), (PseudoCommand.name(), "indirect"))
 
     def test_set_failure(self):
         class C:
@@ -38,3 +52,22 @@ class TestCommandClassDict(unittest.TestCase):
 
         with self.assertRaises(TypeError):
             command.CommandClassDict().set(C)
+        with self.assertRaises(TypeError):
+            command.CommandClassDict().set(PseudoCommand())
+
+    def test_set_unimplemented(self):
+        class C(command.Command):
+            @staticmethod
+            def name():
+                return "unimplemented"
+
+            @classmethod
+            def help(cls):
+                pass
+
+            @classmethod
+            def register(cls, _):
+                pass
+
+        with self.assertRaises(TypeError):
+            command.CommandClassDict().set(C)
@@ -0,0 +1,79 @@
+import pytest
+
+import pkommand.container as c
+
+
+@pytest.mark.parametrize(
+    "title,left,right,want",
+    [
+        ("none none", c.Opt.none(), c.Opt.none(), True),
+        ("none new none", c.Opt.none(), c.Opt.new(None), True),
+        ("some some", c.Opt.some(1), c.Opt.some(1), True),
+        ("some other some", c.Opt.some(1), c.Opt.some(2), False),
+        ("some none", c.Opt.some(1), c.Opt.none(), False),
+        ("none some", c.Opt.none(), c.Opt.some(1), False),
+        ("not opt", c.Opt.some(1), 1, False),
+    ],
+)
+def test_opt_eq(title: str, left: c.Opt, right: c.Opt, want: bool):
+    assert (left == right) == want, title
+
+
+def test_opt_none_is_shared():
+    assert c.Opt.none() is c.Opt.none()
+    assert not c.Opt.none()
+
+
+class Attributes:
+    some = 1
+    none = None
+
+
+@pytest.mark.parametrize(
+    "title,name,want",
+    [
+        ("some", "some", c.Opt.some(1)),
+        ("none value", "none", c.Opt.none()),
+        ("missing", "missing", c.Opt.none()),
+    ],
+)
+def test_get_attribute(title: str, name: str, want: c.Opt):
+    assert c.get_attribute(Attributes, name) == want, title
+
+
+@pytest.mark.parametrize(
+    "title,opt,want",
+    [
+        ("some", c.Opt.some(1), 2),
+        ("none", c.Opt.none(), 0),
+    ],
+)
+def test_opt_map_or(title: str, opt: c.Opt, want: int):
+    assert opt.map_or(0, lambda x: x + 1) == want, title
+
+
+@pytest.mark.parametrize(
+    "title,opt,want",
+    [
+        ("some", c.Opt.some(1), c.Opt.some(1)),
+        ("none", c.Opt.none(), c.Opt.some(0)),
+    ],
+)
+def test_opt_or_else(title: str, opt: c.Opt, want: c.Opt):
+    assert opt.or_else(lambda: c.Opt.some(0)) == want, title
+
+
+class EqualsAnything:
+    def __eq__(self, other):
+        return True
+
+
+def test_opt_eq_does_not_compare_value_with_none():
+    assert c.Opt.some(EqualsAnything()) != c.Opt.none()
+    assert c.Opt.none() != c.Opt.some(EqualsAnything())
+
+
+def test_opt_none_values_are_shared():
+    assert c.Opt.new(None) is c.Opt.none()
+    assert c.Opt.some(1).and_then(lambda _: None) is c.Opt.none()
+    assert c.Opt.none().and_then(lambda x: x) is c.Opt.none()
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import pkommand
+
+ROOT = Path(__file__).parent.parent
+
+
+@pytest.mark.parametrize(
+    "title,stmt,want",
+    [
+        ("import", "import pkommand", False),
+        ("command", "import pkommand; pkommand.Command", False),
+        ("exception", "import pkommand; pkommand.ParserException", False),
+        ("parser", "import pkommand; pkommand.Parser", True),
+    ],
+)
+def test_lazy_import(title: str, stmt: str, want: bool):
+    code = f"import sys; {stmt}; print('argparse' in sys.modules)"
+    got = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT).stdout
+    assert got == f"{want}\n", title
+
+
+def test_public_members():
+    for name in pkommand.__all__:
+        assert getattr(pkommand, name).__name__ == name
+        assert name in dir(pkommand)
+    with pytest.raises(AttributeError):
+        pkommand.Unknown
+
+
+@pytest.mark.parametrize("name", ["command", "container", "exceptions", "parser", "wrapper"])
+def test_submodules(name: str):
+    code = f"import pkommand; print(pkommand.{name}.__name__)"
+    got = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT).stdout
+    assert got == f"pkommand.{name}\n"
+
+
+def test_dir():
+    assert dir(pkommand) == pkommand.__all__
@@ -1,3 +1,4 @@
+from argparse import ArgumentDefaultsHelpFormatter
 from contextlib import redirect_stderr, redirect_stdout
 from io import StringIO
 
@@ -89,6 +90,48 @@ class UnaryCommand(parser.Command):
         p.add_argument("--target", type=int, action="store", help="target_help")
 
 
+class RecordCommand(parser.Command):
+    registered: list[str] = []
+
+    @staticmethod
+    def name():
+        return "record"
+
+    @classmethod
+    def help(cls):
+        return "record_help"
+
+    def run(self, _):
+        print("record_run")
+
+    @classmethod
+    def register(cls, _):
+        cls.registered.append(cls.name())
+
+
+class AliasCommand(parser.Command):
+    @staticmethod
+    def name():
+        return "alias"
+
+    @classmethod
+    def help(cls):
+        return "alias_help"
+
+    def run(self, _):
+        print("alias_run")
+
+    @classmethod
+    def register(cls, _):
+        pass
+
+    @classmethod
+    def register_parser(cls, subparsers):
+        p = subparsers.add_parser(cls.name(), help=cls.help(), aliases=["a1", "a2"])
+        cls.register(p)
+        return p
+
+
 def test_default_run_exception():
     p = parser.Parser(default_run=None)
     p.add_command_class(UnaryCommand)
@@ -230,3 +273,235 @@ def test_run_successfully(title, cmds, args, want_output, want_exc):
         return b.getvalue()
 
     assert want_output == f(), title
+
+
+def test_run_registers_only_invoked_command():
+    registered = RecordCommand.registered = []
+    p = parser.Parser()
+    p.add_command_class(ZeroCommand)
+    p.add_command_class(RecordCommand)
+    b = StringIO()
+    with redirect_stdout(b):
+        p.run(args=["zero"])
+    assert b.getvalue() == "zero_run\n"
+    assert registered == []
+
+
+def test_run_repeatedly():
+    p = parser.Parser()
+    p.add_command_class(ZeroCommand)
+    p.add_command_class(UnaryCommand)
+    b = StringIO()
+    with redirect_stdout(b):
+        p.run(args=["zero"])
+        p.run(args=["unary", "--target", "1"])
+        p.run(args=["zero"])
+    assert b.getvalue() == "zero_run\nunary_run 1\nzero_run\n"
+
+
+def test_help_without_required_arguments():
+    p = parser.Parser()
+    p.add_argument("--table", required=True)
+    p.add_command_class(ZeroCommand)
+    b = StringIO()
+    with redirect_stdout(b):
+        p.run(args=["help", "zero"])
+    assert (
+        b.getvalue()
+        == """usage: pytest zero
+
+zero_help
+"""
+    )
+
+
+def test_help_after_add_argument():
+    p = parser.Parser()
+    p.add_command_class(ZeroCommand)
+
+    def f():
+        b = StringIO()
+        with redirect_stdout(b):
+            p.run(args=["help"])
+        return b.getvalue()
+
+    want = """usage: pytest {help,zero} ...
+
+positional arguments:
+  {help,zero}
+    help       show help and exit
+    zero       zero_help
+"""
+    assert f() == want
+    assert f() == want
+    p.add_argument("--table")
+    assert (
+        f()
+        == """usage: pytest [--table TABLE] {help,zero} ...
+
+positional arguments:
+  {help,zero}
+    help         show help and exit
+    zero         zero_help
+
+options:
+  --table TABLE
+"""
+    )
+
+
+def test_default_run_with_argument_default():
+    def default_run(parser, args, namespace):
+        print(f"default_run() {args.table} {args.command}")
+
+    p = parser.Parser(default_run=default_run)
+    p.add_argument("--table", default="histories")
+    b = StringIO()
+    with redirect_stdout(b):
+        p.run([])
+    assert b.getvalue() == "default_run() histories None\n"
+
+
+def test_default_run_with_parser_default():
+    def default_run(parser, args, namespace):
+        print(f"default_run() {args}")
+
+    p = parser.Parser(default_run=default_run)
+    p.set_defaults(verbose=3)
+    b = StringIO()
+    with redirect_stdout(b):
+        p.run([])
+    assert b.getvalue() == "default_run() Namespace(command=None, verbose=3)\n"
+
+
+def test_run_registers_once():
+    registered = RecordCommand.registered = []
+    p = parser.Parser()
+    p.add_command_class(RecordCommand)
+    b = StringIO()
+    with redirect_stdout(b):
+        p.run(args=["help"])
+        p.run(args=["record"])
+        p.run(args=["record"])
+    assert b.getvalue().endswith("record_run\nrecord_run\n")
+    assert registered == ["record"]
+
+
+def test_run_sniffs_once_per_run(monkeypatch: pytest.MonkeyPatch):
+    RecordCommand.registered = []
+    p = parser.Parser()
+    p.add_command_class(RecordCommand)
+    p.add_command_class(AliasCommand)
+    calls = []
+    sniff = parser.Parser._sniff_subcommands
+
+    def counted(self, args):
+        calls.append(list(args))
+        return sniff(self, args)
+
+    monkeypatch.setattr(parser.Parser, "_sniff_subcommands", counted)
+    b = StringIO()
+    with redirect_stdout(b):
+        for _ in range(3):
+            p.run(args=["record"])
+    assert b.getvalue() == "record_run\n" * 3
+    assert calls == [["record"]] * 3
+    assert RecordCommand.registered == ["record"]
+
+
+@pytest.mark.parametrize(
+    "title,args,want",
+    [
+        (
+            "unrecognized",
+            ["zero", "--bad"],
+            """unrecognized arguments: --bad
+usage: pytest {help,zero,unary} ...
+
+positional arguments:
+  {help,zero,unary}
+    help             show help and exit
+    zero             zero_help
+    unary            unary_help
+""",
+        ),
+        (
+            "invalid choice",
+            ["nosuch", "--target", "zero"],
+            """argument command: invalid choice: 'nosuch' (choose from 'help', 'zero', 'unary')
+usage: pytest {help,zero,unary} ...
+
+positional arguments:
+  {help,zero,unary}
+    help             show help and exit
+    zero             zero_help
+    unary            unary_help
+""",
+        ),
+        (
+            "after unary",
+            ["unary", "--target", "x"],
+            """argument --target: invalid int value: 'x'
+usage: pytest {help,zero,unary} ...
+
+positional arguments:
+  {help,zero,unary}
+    help             show help and exit
+    zero             zero_help
+    unary            unary_help
+""",
+        ),
+    ],
+)
+def test_parse_exception_lists_all_commands(title, args, want):
+    p = parser.Parser()
+    p.add_command_class(ZeroCommand)
+    p.add_command_class(UnaryCommand)
+    b = StringIO()
+    with redirect_stderr(b), pytest.raises(SystemExit):
+        p.run(args=args)
+    assert want == b.getvalue(), title
+
+
+def test_run_with_aliases():
+    p = parser.Parser()
+    p.add_command_class(AliasCommand)
+    p.add_command_class(ZeroCommand)
+    p.add_command_class(UnaryCommand)
+    p.add_command_class(RecordCommand)
+    b = StringIO()
+    with redirect_stdout(b):
+        p.run(args=["alias"])
+        p.run(args=["zero"])
+        p.run(args=["unary", "--target", "1"])
+        p.run(args=["record"])
+    assert b.getvalue() == "alias_run\nzero_run\nunary_run 1\nrecord_run\n"
+
+
+def test_help_after_set_defaults_and_description():
+    p = parser.Parser(formatter_class=ArgumentDefaultsHelpFormatter)
+    p.add_argument("--table", help="table name")
+    p.add_command_class(ZeroCommand)
+
+    def f():
+        b = StringIO()
+        with redirect_stdout(b):
+            p.run(args=["help"])
+        return b.getvalue()
+
+    assert "(default: None)" in f()
+    p.set_defaults(table="histories")
+    assert "(default: histories)" in f()
+    p.description = "the description"
+    assert "the description" in f()
+
+
+def test_run_iterator():
+    RecordCommand.registered = []
+    p = parser.Parser()
+    p.add_command_class(RecordCommand)
+    b = StringIO()
+    with redirect_stdout(b):
+        p.run(args=iter(["record"]))
+    assert b.getvalue() == "record_run\n"
+    assert p.parse_args(args=iter(["record"])).command == "record"
@@ -1,8 +1,11 @@
-from contextlib import redirect_stdout
+import gc
+import weakref
+from argparse import ArgumentParser, ArgumentTypeError
+from contextlib import redirect_stderr, redirect_stdout
 from dataclasses import dataclass
 from inspect import signature
 from io import StringIO
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import pytest
 
@@ -234,6 +237,11 @@ def jump(world: str, t: str):
     print(f"jump to {world}, {t}")
 
 
+def next_point(name: str, next: int):
+    """next point"""
+    print(f"next point {name}, {next}")
+
+
 @pytest.mark.parametrize(
     "title,func,args,want",
     [
@@ -249,6 +257,25 @@ def jump(world: str, t: str):
             ["jump", "-w", "Lunatea", "-t", "0"],
             "jump to Lunatea, 0\n",
         ),
+        (
+            "conflict",
+            next_point,
+            ["next_point", "-n", "Lunatea", "--next", "1"],
+            "next point Lunatea, 1\n",
+        ),
+        (
+            "conflict help",
+            next_point,
+            ["help", "next_point"],
+            """usage: pytest next_point -n NAME --next NEXT
+
+options:
+  -n NAME, --name NAME
+  --next NEXT
+
+next point
+""",
+        ),
         (
             "help",
             jump,
@@ -339,3 +366,198 @@ def test_run_doc(title: str, args: list[str], want: str):
         return b.getvalue()
 
     assert want == f(), title
+
+
+@dataclass
+class IntList:
+    values: list[int]
+
+    @staticmethod
+    def parse_flag(value: str) -> Any:
+        return IntList(values=[int(x) for x in value.split(",")])
+
+
+def int_list_command(xs: IntList):
+    """int_list_help"""
+    print(f"int_list_run {xs}")
+
+
+def test_run_custom_parse_error():
+    w = wrapper.Wrapper.default(abbr=False)
+    w.add(int_list_command)
+    b = StringIO()
+    with redirect_stderr(b), pytest.raises(SystemExit):
+        w.run(args=["int_list_command", "--xs", "1,x"])
+    assert b.getvalue().startswith("argument --xs: invalid IntList value: '1,x': invalid literal for int()")
+
+
+def test_function_signature_is_shared():
+    assert wrapper.Function.new(jump).signature is wrapper.Function.new(jump).signature
+    assert wrapper.Function.new(jump).signature == signature(jump)
+
+
+def test_generate_reuses_class():
+    klass = wrapper.CommandGenerator.new(jump).generate(abbr=True)
+    assert wrapper.CommandGenerator.new(jump).generate(abbr=True) is klass
+    assert wrapper.CommandGenerator.new(jump).generate(abbr=False) is not klass
+
+
+def no_annotation_command(a):
+    pass
+
+
+def test_add_no_annotation():
+    with pytest.raises(wrapper.BadTargetException):
+        wrapper.Wrapper.default().add(no_annotation_command)
+
+
+@pytest.mark.parametrize(
+    "title,f,index,want",
+    [
+        ("no annotation", t_annotation_no_annotation, 0, c.Opt.none()),
+        ("not bool", t_default_no_default, 0, c.Opt.none()),
+        ("bool", bool_command, 0, c.Opt.some("store_true")),
+        ("bool default false", bool_command, 1, c.Opt.some("store_true")),
+        ("bool default true", bool_command, 2, c.Opt.some("store_false")),
+    ],
+)
+def test_bool_param_to_arg(title: str, f: Callable, index: int, want: c.Opt):
+    p = list(signature(f).parameters.values())[index]
+    got = wrapper.BoolParamToArg()(wrapper.Param.new(p))
+    assert got.and_then(lambda x: x.kwargs["action"]) == want, title
+
+
+@pytest.mark.parametrize(
+    "title,f,abbr,want",
+    [
+        ("normal", jump, False, ["--world"]),
+        ("abbr", jump, True, ["-w", "--world"]),
+        ("one letter", t_default_no_default, True, ["-a"]),
+    ],
+)
+def test_param_flag_names(title: str, f: Callable, abbr: bool, want: list[str]):
+    p = wrapper.Param.new(list(signature(f).parameters.values())[0], abbr)
+    assert p.flag_names == want, title
+    assert p.flag_names is p.flag_names, title
+
+
+def test_regarg_list_apply():
+    p = ArgumentParser()
+    wrapper.CommandGenerator.new(jump).regargs(abbr=True).apply(p)
+    assert "_get_formatter" not in vars(p)
+    ns = p.parse_args(["-w", "Lunatea", "-t", "0"])
+    assert (ns.world, ns.t) == ("Lunatea", "0")
+
+
+def keyword_command(a: int, *, b: int = 2):
+    """keyword_help"""
+    print(f"keyword_run {a} {b}")
+
+
+def test_run_keyword_only():
+    w = wrapper.Wrapper.default(abbr=False)
+    w.add(keyword_command)
+    b = StringIO()
+    with redirect_stdout(b):
+        w.run(args=["keyword_command", "--a", "1", "--b", "3"])
+    assert b.getvalue() == "keyword_run 1 3\n"
+
+
+def test_run_with_parser_argument():
+    p = wrapper.Parser()
+    p.add_argument("--verbose", action="store_true")
+    w = wrapper.Wrapper(p)
+    w.add(unary_command)
+    b = StringIO()
+    with redirect_stdout(b):
+        w.run(args=["--verbose", "unary_command", "--target", "1"])
+    assert b.getvalue() == "unary_run 1\n"
+
+
+@dataclass
+class Positive:
+    value: int
+
+    @staticmethod
+    def parse_flag(value: str) -> Any:
+        if int(value) <= 0:
+            raise ArgumentTypeError(f"not positive: {value}")
+        return Positive(value=int(value))
+
+
+def positive_command(p: Positive):
+    """positive_help"""
+    print(f"positive_run {p}")
+
+
+def test_run_custom_argument_type_error():
+    w = wrapper.Wrapper.default(abbr=False)
+    w.add(positive_command)
+    b = StringIO()
+    with redirect_stderr(b), pytest.raises(SystemExit):
+        w.run(args=["positive_command", "--p", "0"])
+    assert b.getvalue().startswith("argument --p: not positive: 0\n")
+
+
+class Color:
+    @staticmethod
+    def parse_flag(value: str) -> Any:
+        return {"red": 1}[value]
+
+
+def color_command(c: Color):
+    print(f"color_run {c}")
+
+
+def test_run_custom_argument_other_error():
+    w = wrapper.Wrapper.default(abbr=False)
+    w.add(color_command)
+    b = StringIO()
+    with redirect_stderr(b), pytest.raises(SystemExit) as e:
+        w.run(args=["color_command", "--c", "blue"])
+    assert e.value.code == 1
+    assert b.getvalue().startswith("argument --c: invalid Color value: 'blue': 'blue'\n")
+
+
+def bare_list_command(a: List):
+    pass
+
+
+def bare_dict_command(a: Dict):
+    pass
+
+
+@pytest.mark.parametrize("func", [bare_list_command, bare_dict_command])
+def test_add_bare_generic(func: Callable):
+    with pytest.raises(wrapper.BadTargetException):
+        wrapper.Wrapper.default().add(func)
+
+
+def test_is_custom_action_does_not_keep_type_alive():
+    class T:
+        @staticmethod
+        def parse_flag(value: str) -> int:
+            return int(value)
+
+    assert wrapper._is_custom_action(T)
+    assert wrapper._is_custom_action(T)
+    ref = weakref.ref(T)
+    del T
+    gc.collect()
+    assert ref() is None
+
+
+def append_command(xs: list[str]):
+    xs.append("x")
+    print(xs)
+
+
+def test_run_list_default_not_shared():
+    for _ in range(3):
+        w = wrapper.Wrapper.default()
+        w.add(append_command)
+        out = StringIO()
+        with redirect_stdout(out):
+            w.run(["append_command"])
+            w.run(["append_command"])
+        assert out.getvalue() == "['x']\n['x']\n"